@@ -4,11 +4,12 @@ import zipfile
 
 def zipdir(path, ziph):
     # ziph is zipfile handle
+    # Archive names are relative to the parent directory of path
+    base = os.path.join(path, '..')
     for root, dirs, files in os.walk(path):
         for file in files:
-            ziph.write(os.path.join(root, file),
-                       os.path.relpath(os.path.join(root, file),
-                                       os.path.join(path, '..')))
+            file_path = os.path.join(root, file)
+            ziph.write(file_path, os.path.relpath(file_path, base))
 
 
 with zipfile.ZipFile('/files/app1.zip', 'w', zipfile.ZIP_DEFLATED) as zipf:
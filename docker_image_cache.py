@@ -1,14 +1,19 @@
+import sys
 import time
 import enum
+import bisect
+import heapq
+import itertools
 import threading
-from collections import defaultdict
-from typing import Dict, Set, List, Tuple, Optional
+from collections import OrderedDict, defaultdict, deque
+from typing import Callable, Deque, Dict, Iterable, Set, List, Tuple, Optional
 
 
 class EvictionPolicy(enum.Enum):
     """Enumeration of available eviction policies."""
     LEAST_FREQUENTLY_USED = 1  # Evict the least frequently used image in the time window
     LEAST_TOTAL_TIME_USED = 2  # Evict the image with the least total usage time
+    CLOCK = 3                  # Evict the first image not used since the clock hand last passed it
 
 
 class DockerImageCache:
@@ -19,27 +24,81 @@ class DockerImageCache:
     and provides mechanisms to evict images based on different policies:
     1. Least frequently used in a time window
     2. Least total time used
+    3. CLOCK (second chance)
     """
 
-    def __init__(self, time_window: int = 3600, cache_size: int = 100, policy: EvictionPolicy = EvictionPolicy.LEAST_FREQUENTLY_USED):
+    # Fixed attribute layout: no per-instance __dict__, and faster attribute access
+    __slots__ = (
+        '_lock', '_evictable', 'image_containers', '_unused', 'image_usage_history',
+        'image_last_used', 'image_recent_usage_time', '_expirations', '_eviction_heap',
+        '_eviction_metric', '_eviction_default', '_entry_seq', '_entry_counter', '_clock', 'container_start_times', 'container_images', 'time_window',
+        'cache_size', '_policy', '_select_victim', '_now',
+    )
+
+    def __init__(self, time_window: int = 3600, cache_size: int = 100, policy: EvictionPolicy = EvictionPolicy.LEAST_FREQUENTLY_USED,
+                 time_source: Callable[[], float] = time.monotonic):
         """
         Initialize the Docker image cache.
 
         Args:
             time_window: Time window in seconds to consider for usage statistics (default: 1 hour)
             policy: Eviction policy to use (default: LEAST_FREQUENTLY_USED)
+            time_source: Function returning the current time in seconds (default: time.monotonic)
         """
         # Thread lock for protecting shared resources
         self._lock = threading.Lock()
 
-        # Map of image_id -> set of container_ids using this image
-        self.image_containers: Dict[str, Set[str]] = defaultdict(set)
+        # Condition notified when an image in the cache becomes unused, i.e. evictable
+        self._evictable = threading.Condition(self._lock)
+
+        # Map of image_id -> set of container_ids using this image.
+        # Not a defaultdict, so that a lookup never adds an image to the cache.
+        self.image_containers: Dict[str, Set[str]] = {}
+
+        # Set of image_ids in the cache that no container is using
+        self._unused: Set[str] = set()
+
+        # Map of image_id -> queue of (start_time, end_time) of the usages started
+        # within the time window, sorted by start_time
+        self.image_usage_history: Dict[str, Deque[Tuple[float, float]]] = {}
+
+        # Map of image_id -> start time of the latest recorded usage
+        self.image_last_used: Dict[str, float] = {}
+
+        # Map of image_id -> total usage time of the usages started within the time window
+        self.image_recent_usage_time: Dict[str, float] = defaultdict(float)
+
+        # Min-heap of (start_time, image_id) of the usages in image_usage_history,
+        # used to expire them lazily
+        self._expirations: List[Tuple[float, str]] = []
+
+        # Min-heap of (metric, seq, image_id) of the eviction candidates of the policy, and
+        # the map of image_id -> metric it is ordered by: the start time of the latest usage,
+        # or the total usage time in the time window. None when the policy needs no heap.
+        # Entries are not removed when they become outdated, but skipped when popped.
+        self._eviction_heap: List[Tuple[float, int, str]] = []
+        self._eviction_metric: Optional[Dict[str, float]] = None
 
-        # Map of image_id -> list of (start_time, end_time)
-        self.image_usage_history: Dict[str, List[Tuple[float, float]]] = defaultdict(list)
+        # Metric of an image without statistics: never used, or no usage in the window
+        self._eviction_default = 0.0
 
-        # Map of (image_id, container_id) -> start timestamp
-        self.container_start_times: Dict[Tuple[str, str], float] = {}
+        # Map of image_id -> sequence number of the image in the cache, increasing in the
+        # order the images entered it, so that ties evict the image cached first
+        self._entry_seq: Dict[str, int] = {}
+        self._entry_counter = itertools.count()
+
+        # Ring of the CLOCK policy: image_id -> reference bit, in the order the clock
+        # hand visits the images. The hand points at the first entry.
+        # Only maintained when the policy is CLOCK.
+        self._clock: 'OrderedDict[str, bool]' = OrderedDict()
+
+        # Map of container_id -> start timestamp.
+        # Container IDs are unique, so the image ID is not needed in the key.
+        self.container_start_times: Dict[str, float] = {}
+
+        # Map of container_id -> image_id of the running containers,
+        # so that a container can be stopped without knowing its image
+        self.container_images: Dict[str, str] = {}
 
         # Time window to consider for usage statistics (in seconds)
         self.time_window = time_window
@@ -47,25 +106,88 @@ class DockerImageCache:
         # Maximum number of images to keep in the cache
         self.cache_size = cache_size
 
-        # Eviction policy to use
-        self.policy = policy
+        # Clock used to timestamp the usages
+        self._now = time_source
+
+        # Eviction policy to use, which decides the eviction state to maintain
+        self._set_policy(policy)
+
+    @property
+    def policy(self) -> EvictionPolicy:
+        """The eviction policy in use."""
+        return self._policy
+
+    @policy.setter
+    def policy(self, policy: EvictionPolicy) -> None:
+        with self._lock:
+            self._set_policy(policy)
 
-    def _record_usage(self, image_id: str, container_id: str) -> None:
+    def _set_policy(self, policy: EvictionPolicy) -> None:
+        """
+        Switch to an eviction policy and rebuild the eviction state it needs from the
+        current cache contents. Only the eviction heap or ring of the active policy is
+        maintained; the usage histories and windowed totals are kept, and expired as
+        containers stop, for every policy. The lock must be held by the caller.
+
+        Args:
+            policy: The eviction policy to use
+        """
+        self._policy = policy
+
+        # Look up the victim selection of the policy once, instead of dispatching on every
+        # eviction: whether the usages must be expired first, and the function choosing the
+        # victim. The functions are stored unbound to avoid a reference cycle.
+        self._select_victim = {
+            EvictionPolicy.LEAST_FREQUENTLY_USED: (False, DockerImageCache._pop_eviction_candidate),
+            EvictionPolicy.LEAST_TOTAL_TIME_USED: (True, DockerImageCache._pop_eviction_candidate),
+            EvictionPolicy.CLOCK: (False, DockerImageCache._advance_clock),
+        }.get(policy)
+
+        self._eviction_heap.clear()
+        self._clock.clear()
+
+        if policy == EvictionPolicy.LEAST_FREQUENTLY_USED:
+            # An image that was never used is the least recently used one
+            self._eviction_metric = self.image_last_used
+            self._eviction_default = float('-inf')
+        elif policy == EvictionPolicy.LEAST_TOTAL_TIME_USED:
+            self._eviction_metric = self.image_recent_usage_time
+            self._eviction_default = 0.0
+        else:
+            self._eviction_metric = None
+
+        if self._eviction_metric is not None:
+            self._eviction_heap.extend(
+                self._eviction_entry(image_id) for image_id in self._unused)
+            heapq.heapify(self._eviction_heap)
+        elif policy == EvictionPolicy.CLOCK:
+            # The usages before the switch are unknown to the clock, so no bit is set
+            self._clock.update((image_id, False) for image_id in self.image_containers)
+
+    def _record_usage(self, image_id: str, container_id: str, current_time: float) -> None:
         """
         Called when an image is used for a container.
 
         Args:
             image_id: The ID of the Docker image
             container_id: The ID of the container using the image
+            current_time: The timestamp the container starts at
         """
         # Record that this container is using this image
-        self.image_containers[image_id].add(container_id)
+        containers = self.image_containers.get(image_id)
+        if containers is None:
+            containers = self.image_containers[image_id] = set()
+            self._entry_seq[image_id] = next(self._entry_counter)
+        containers.add(container_id)
+        self._unused.discard(image_id)
 
-        # Record the current time as a usage timestamp
-        current_time = time.time()
+        # Set the reference bit. A new image is inserted right behind the clock hand.
+        if self._policy == EvictionPolicy.CLOCK:
+            self._clock[image_id] = True
 
-        # Store the start time for this container/image pair
-        self.container_start_times[(image_id, container_id)] = current_time
+        # Store the start time and the image of this container
+        self.container_start_times[container_id] = current_time
+        self.container_images[container_id] = image_id
 
     def record_stop(self, image_id: str, container_id: str) -> None:
         """
@@ -75,59 +197,220 @@ class DockerImageCache:
             image_id: The ID of the Docker image
             container_id: The ID of the container that was using the image
         """
+        # Read the clock before taking the lock to keep the critical section short
+        end_time = self._now()
+
+        # Interned IDs share one string object across all the maps and sets
+        image_id, container_id = sys.intern(image_id), sys.intern(container_id)
+
         with self._lock:
-            # Calculate usage time if we have a start time for this container/image pair
-            if (image_id, container_id) in self.container_start_times:
-                start_time = self.container_start_times[(image_id, container_id)]
-                end_time = time.time()
+            if self._record_stop(image_id, container_id, end_time):
+                self._evictable.notify_all()
 
-                # Add the calculated usage time to the total for this image
-                self.image_usage_history[image_id].append((start_time, end_time))
+    def record_stops(self, stops: Iterable[Tuple[str, str]]) -> None:
+        """
+        Called when several containers stop at once, e.g. for a batch of docker events.
+        Equivalent to calling record_stop for each of them, with a single timestamp
+        and lock acquisition for the whole batch.
 
-                # Remove the start time entry
-                del self.container_start_times[(image_id, container_id)]
+        Args:
+            stops: Pairs of (image_id, container_id) of the stopped containers
+        """
+        end_time = self._now()
+        stops = [(sys.intern(image_id), sys.intern(container_id))
+                 for image_id, container_id in stops]
 
-            # Remove this container from the set of containers using this image
-            if image_id in self.image_containers and container_id in self.image_containers[image_id]:
-                self.image_containers[image_id].remove(container_id)
+        with self._lock:
+            evictable = False
+            for image_id, container_id in stops:
+                evictable |= self._record_stop(image_id, container_id, end_time)
+            if evictable:
+                self._evictable.notify_all()
 
-    def _get_unused_images(self) -> List[str]:
+    def record_stop_by_container(self, container_id: str) -> Optional[str]:
         """
-        Get a list of images that are not currently used by any containers.
+        Called when a container stops, when the image it was using is not known
+        to the caller.
+
+        Args:
+            container_id: The ID of the container
 
         Returns:
-            A list of image IDs that are not in use
+            The ID of the image the container was using, or None if the container
+            is not running
         """
-        return [
-            image_id for image_id, containers in self.image_containers.items()
-            if len(containers) == 0
-        ]
+        end_time = self._now()
+
+        with self._lock:
+            image_id = self.container_images.get(container_id)
+            if image_id is not None and self._record_stop(image_id, container_id, end_time):
+                self._evictable.notify_all()
+            return image_id
 
-    def _get_recent_time_interval(self, image_id: str) -> float:
+    def _record_stop(self, image_id: str, container_id: str, end_time: float) -> bool:
+        """
+        Record that a container stopped using an image. The lock must be held by the
+        caller, who must notify the waiters if the image became evictable.
+
+        Args:
+            image_id: The ID of the Docker image
+            container_id: The ID of the container that was using the image
+            end_time: The timestamp the container stopped at
+
+        Returns:
+            True if the image became unused, False otherwise
+        """
+        # Ignore the stop of a container that is not running this image, so that
+        # it cannot take over the start time of the container
+        if self.container_images.get(container_id) != image_id:
+            return False
+        del self.container_images[container_id]
+
+        # Expire the usages that left the time window for every policy, so that the
+        # histories stay bounded by the window. Amortized O(log n) per usage.
+        self._expire_usages(end_time)
+
+        # Calculate usage time if we have a start time for this container
+        start_time = self.container_start_times.pop(container_id, None)
+        if start_time is not None:
+            if start_time > self.image_last_used.get(image_id, float('-inf')):
+                self.image_last_used[image_id] = start_time
+
+            # Record the usage if it started within the time window
+            if start_time >= end_time - self.time_window:
+                history = self.image_usage_history.get(image_id)
+                if history is None:
+                    history = self.image_usage_history[image_id] = deque()
+
+                # Keep the history sorted by start time. Containers usually stop
+                # in start order, so this is almost always an append.
+                usage = (start_time, end_time)
+                if not history or history[-1] <= usage:
+                    history.append(usage)
+                else:
+                    history.insert(bisect.bisect(history, usage), usage)
+
+                self.image_recent_usage_time[image_id] += end_time - start_time
+                heapq.heappush(self._expirations, (start_time, image_id))
+
+        # Remove this container from the set of containers using this image
+        containers = self.image_containers.get(image_id)
+        if containers is not None and container_id in containers:
+            containers.remove(container_id)
+
+            # The image can be evicted once no container uses it anymore
+            if not containers:
+                self._unused.add(image_id)
+                self._push_eviction_candidate(image_id)
+                return True
+        return False
+
+    def _expire_usages(self, current_time: float) -> None:
+        """
+        Remove the usages that started before the time window from the usage
+        histories and the aggregated usage statistics.
+
+        Args:
+            current_time: The timestamp the time window ends at
+        """
+        cutoff_time = current_time - self.time_window
+        while self._expirations and self._expirations[0][0] < cutoff_time:
+            _, image_id = heapq.heappop(self._expirations)
+
+            # Both the heap and the history are ordered by start time, so the
+            # expired usage is the oldest one in the history of the image
+            history = self.image_usage_history[image_id]
+            start_time, end_time = history.popleft()
+            if not history:
+                # Reset instead of subtracting so that rounding errors do not accumulate
+                self.image_recent_usage_time[image_id] = 0.0
+            else:
+                self.image_recent_usage_time[image_id] -= end_time - start_time
+
+            # The usage time of the image dropped, so its eviction candidate is outdated
+            if (self._eviction_metric is self.image_recent_usage_time
+                    and self._is_unused(image_id)):
+                self._push_eviction_candidate(image_id)
+
+    def _is_unused(self, image_id: str) -> bool:
+        """
+        Check whether an image is in the cache but not used by any container.
+
+        Args:
+            image_id: The ID of the Docker image
+
+        Returns:
+            True if the image can be evicted, False otherwise
+        """
+        return image_id in self._unused
+
+    def _push_eviction_candidate(self, image_id: str) -> None:
+        """
+        Push the current eviction metric of an unused image into the eviction heap,
+        if the policy uses one.
+
+        Args:
+            image_id: The ID of the Docker image
         """
-        Get the time interval from latest usage of an image to now.
+        heap = self._eviction_heap
+        if self._eviction_metric is None:
+            return
+        heapq.heappush(heap, self._eviction_entry(image_id))
+
+        # Rebuild the heap once outdated entries dominate it. Repeated pushes of an
+        # unchanged metric leave duplicates that all stay valid, so keep one entry
+        # per image: the heap then shrinks to at most the number of unused images.
+        if len(heap) > 2 * self.cache_size + 16:
+            heap[:] = {entry for entry in heap if self._is_current_entry(entry)}
+            heapq.heapify(heap)
+
+    def _eviction_entry(self, image_id: str) -> Tuple[float, int, str]:
+        """
+        Build the eviction heap entry of an image in the cache from its current metric.
 
         Args:
             image_id: The ID of the Docker image
 
         Returns:
-            The time interval from latest usage of the image to now
+            The tuple (metric, seq, image_id)
+        """
+        return (self._eviction_metric.get(image_id, self._eviction_default),
+                self._entry_seq[image_id], image_id)
+
+    def _is_current_entry(self, entry: Tuple[float, int, str]) -> bool:
         """
-        if image_id not in self.image_usage_history:
-            return float('inf')
+        Check whether an eviction heap entry is up to date, i.e. its image is unused
+        and has not left the cache or changed its metric since the entry was pushed.
 
-        current_time = time.time()
+        Args:
+            entry: The eviction heap entry
 
-        # Get the latest usage time of the image
-        min_time_interval = min(
-            current_time - start_time for (start_time, end_time) in self.image_usage_history[image_id]
-        )
+        Returns:
+            True if the entry is up to date, False otherwise
+        """
+        image_id = entry[2]
+        return self._is_unused(image_id) and entry == self._eviction_entry(image_id)
 
-        return min_time_interval
+    def _pop_eviction_candidate(self) -> Optional[str]:
+        """
+        Pop the unused image with the smallest metric from the eviction heap.
+        Outdated entries, i.e. images that were evicted, are in use or whose metric
+        changed, are discarded on the way.
+
+        Returns:
+            The ID of the image with the smallest metric, or None if no image is unused
+        """
+        heap = self._eviction_heap
+        while heap:
+            entry = heapq.heappop(heap)
+            if self._is_current_entry(entry):
+                return entry[2]
+        return None
 
     def _count_recent_usage_time(self, image_id: str) -> float:
         """
         Get the total time an image has been used within the time window.
+        _expire_usages must have been called with the current time beforehand.
 
         Args:
             image_id: The ID of the Docker image
@@ -135,21 +418,97 @@ class DockerImageCache:
         Returns:
             The total time the image has been used within the time window (in seconds)
         """
-        if image_id not in self.image_usage_history:
-            return 0
+        return self.image_recent_usage_time.get(image_id, 0)
 
-        current_time = time.time()
-        cutoff_time = current_time - self.time_window
+    def _evict(self, current_time: float) -> Optional[str]:
+        """
+        Choose an unused image according to the eviction policy and remove it from
+        the cache. The lock must be held by the caller.
 
-        # Count usages that occurred within the time window
-        total_usage_time = sum(
-            end_time - start_time for (start_time, end_time) in self.image_usage_history[image_id]
-            if start_time >= cutoff_time
-        )
+        Args:
+            current_time: The current timestamp
 
-        return total_usage_time
+        Returns:
+            The ID of the evicted image, or None if all images are in use
+        """
+        if self._select_victim is None:
+            raise ValueError(f"Unknown eviction policy: {self._policy}")
+        needs_expiry, select_victim = self._select_victim
+
+        # The usage times must be up to date to compare them
+        if needs_expiry:
+            self._expire_usages(current_time)
+        image_to_evict = select_victim(self)
+
+        if image_to_evict is not None:
+            self.image_containers.pop(image_to_evict)
+            self._entry_seq.pop(image_to_evict)
+            self._unused.discard(image_to_evict)
+            self._clock.pop(image_to_evict, None)
+        return image_to_evict
+
+    def _advance_clock(self) -> Optional[str]:
+        """
+        Advance the clock hand until it points at an unused image whose reference bit
+        is clear, clearing the reference bits of the unused images it passes.
+
+        Returns:
+            The ID of the image the hand stopped at, or None if all images are in use
+        """
+        if not self._unused:
+            return None
+
+        # Every unused image has its bit cleared during the first revolution,
+        # so the hand stops within two revolutions
+        while True:
+            image_id, referenced = next(iter(self._clock.items()))
+            if image_id in self._unused and not referenced:
+                return image_id
+            if image_id in self._unused:
+                self._clock[image_id] = False
+            self._clock.move_to_end(image_id)
+
+    def _put_image(self, image_id: str, container_id: str, current_time: float) -> Optional[str]:
+        """
+        Try to put an image into the cache. The lock must be held by the caller.
+
+        Args:
+            image_id: The ID of the Docker image
+            container_id: The ID of the container using the image
+            current_time: The current timestamp
 
-    def put_image(self, image_id: str, container_id: str) -> Optional[str]:
+        Returns:
+            The same as put_image
+        """
+        # Container IDs key the running containers, so a new run under the ID of a
+        # running container means that container stopped. Stop it first, so that
+        # its image does not stay in use forever.
+        previous_image = self.container_images.get(container_id)
+        if previous_image is not None and self._record_stop(previous_image, container_id,
+                                                            current_time):
+            self._evictable.notify_all()
+
+        # If the image is already in the cache, do nothing
+        if image_id in self.image_containers:
+            self._record_usage(image_id, container_id, current_time)
+            return "Already in cache"
+        
+        # If the cache is not full, put the image into the cache
+        if len(self.image_containers) < self.cache_size:
+            self._record_usage(image_id, container_id, current_time)
+            return "Directly put in cache"
+
+        # Otherwise, evict an image and put the new image into the cache
+        image_to_evict = self._evict(current_time)
+
+        if image_to_evict is None:
+            return None  # No images available for eviction
+
+        self._record_usage(image_id, container_id, current_time)
+        return image_to_evict
+
+    def put_image(self, image_id: str, container_id: str,
+                  block: bool = False, timeout: Optional[float] = None) -> Optional[str]:
         """
         Put an image into the cache. If the image is already in the cache, do nothing.
         If the cache is full, evict an image and put the new image into the cache.
@@ -157,53 +516,101 @@ class DockerImageCache:
         Args:
             image_id: The ID of the Docker image
             container_id: The ID of the container using the image
+            block: Whether to wait for an image to become evictable when the cache is
+                full and all the images in it are in use (default: False)
+            timeout: Maximum time in seconds to wait when block is True (default: no limit)
 
         Returns:
             "Already in cache" if the image is already in the cache;
             "Directly put in cache" if the image can be directly put into cache;
             the ID of the image that was evicted if some image was evicted;
             None if the cache is too full to put the image into the cache
+            (only when block is False or the timeout expired)
+        """
+        # Read the clock once for all the bookkeeping of this call
+        current_time = self._now()
+
+        # Interned IDs share one string object across all the maps and sets,
+        # and make the key comparisons of the lookups identity checks
+        image_id, container_id = sys.intern(image_id), sys.intern(container_id)
+
+        with self._evictable:
+            result = self._put_image(image_id, container_id, current_time)
+            if not block:
+                return result
+
+            # Wait for a container to stop and leave an image to evict. The wait
+            # sleeps in real time, so the deadline must not use the injected clock.
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while result is None:
+                if deadline is None:
+                    self._evictable.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._evictable.wait(remaining)
+                result = self._put_image(image_id, container_id, self._now())
+
+            return result
+
+    def remove_image(self, image_id: str) -> bool:
+        """
+        Remove an unused image from the cache, e.g. when it was deleted outside of
+        the cache, and forget its usage statistics.
+
+        Args:
+            image_id: The ID of the Docker image
+
+        Returns:
+            True if the image was removed from the cache;
+            False, without changing anything, if it is used by a container or not in the cache
         """
         with self._lock:
-            # If the image is already in the cache, do nothing
-            if image_id in self.image_containers:
-                self._record_usage(image_id, container_id)
-                return "Already in cache"
-            
-            # If the cache is not full, put the image into the cache
-            if len(self.image_containers) < self.cache_size:
-                self._record_usage(image_id, container_id)
-                return "Directly put in cache"
-
-            # Otherwise, evict an image and put the new image into the cache
-            unused_images = self._get_unused_images()
-
-            if not unused_images:
-                return None  # No images available for eviction
-
-            # Use the specified policy or the default policy
-            active_policy = self.policy
-
-            if active_policy == EvictionPolicy.LEAST_FREQUENTLY_USED:
-                # Find the image with the least recent usage
-                least_recent_image = max(
-                    unused_images,
-                    key=lambda x: self._get_recent_time_interval(x)
-                )
-                self.image_containers.pop(least_recent_image)
-                self._record_usage(image_id, container_id)
-                return least_recent_image
-            elif active_policy == EvictionPolicy.LEAST_TOTAL_TIME_USED:
-                # Find the image with the least total usage time
-                least_time_used_image = min(
-                    unused_images,
-                    key=lambda x: self._count_recent_usage_time(x)
-                )
-                self.image_containers.pop(least_time_used_image)
-                self._record_usage(image_id, container_id)
-                return least_time_used_image
-            else:
-                raise ValueError(f"Unknown eviction policy: {active_policy}")
+            containers = self.image_containers.get(image_id)
+            if containers is None or containers:
+                return False
+
+            if self.image_usage_history.pop(image_id, None):
+                self._expirations = [entry for entry in self._expirations
+                                     if entry[1] != image_id]
+                heapq.heapify(self._expirations)
+            self.image_last_used.pop(image_id, None)
+            self.image_recent_usage_time.pop(image_id, None)
+
+            # Its entries in the eviction heap become outdated, as it is not unused anymore
+            del self.image_containers[image_id]
+            del self._entry_seq[image_id]
+            self._unused.discard(image_id)
+            self._clock.pop(image_id, None)
+
+            # The cache has room again, so blocked put_image calls can proceed
+            self._evictable.notify_all()
+            return True
+
+    def get_unused_images(self) -> List[str]:
+        """
+        Get a list of images in the cache that are not used by any container.
+
+        Returns:
+            A list of image IDs that can be evicted
+        """
+        with self._lock:
+            return list(self._unused)
+
+    def is_unused(self, image_id: str) -> bool:
+        """
+        Check whether an image is in the cache but not used by any container,
+        without building the list of all unused images.
+
+        Args:
+            image_id: The ID of the Docker image
+
+        Returns:
+            True if the image can be evicted, False otherwise
+        """
+        with self._lock:
+            return self._is_unused(image_id)
 
     def get_image_stats(self) -> List[Tuple[str, int, int, float]]:
         """
@@ -212,13 +619,51 @@ class DockerImageCache:
         Returns:
             A list of tuples (image_id, container_count, recent_usage_time_interval, total_usage_time)
         """
+        current_time = self._now()
+
+        # Only copy the raw statistics while holding the lock
+        with self._lock:
+            self._expire_usages(current_time)
+
+            snapshot = [
+                (image_id, len(containers), self.image_last_used.get(image_id),
+                 self._count_recent_usage_time(image_id))
+                for image_id, containers in self.image_containers.items()
+            ]
+
+        stats = []
+        for image_id, container_count, last_used, total_usage_time in snapshot:
+            # Time interval from the latest usage of the image to now
+            if last_used is None:
+                recent_usage_time_interval = float('inf')
+            else:
+                recent_usage_time_interval = current_time - last_used
+            stats.append((image_id, container_count,
+                        recent_usage_time_interval, total_usage_time))
+
+        return stats
+
+    def reset(self, policy: Optional[EvictionPolicy] = None) -> None:
+        """
+        Empty the cache and forget all usage statistics, clearing the internal maps in place.
+        Running containers are forgotten too, so their later stops are ignored.
+
+        Args:
+            policy: Eviction policy to use from now on (default: keep the current policy)
+        """
         with self._lock:
-            stats = []
-            for image_id in self.image_containers:
-                container_count = len(self.image_containers[image_id])
-                recent_usage_time_interval = self._get_recent_time_interval(image_id)
-                total_usage_time = self._count_recent_usage_time(image_id)
-                stats.append((image_id, container_count,
-                            recent_usage_time_interval, total_usage_time))
-
-            return stats
+            self.image_containers.clear()
+            self._entry_seq.clear()
+            self._unused.clear()
+            self.image_usage_history.clear()
+            self.image_last_used.clear()
+            self.image_recent_usage_time.clear()
+            self._expirations.clear()
+            self.container_start_times.clear()
+            self.container_images.clear()
+
+            # Also empties the eviction state of the policy
+            self._set_policy(self._policy if policy is None else policy)
+
+            # The cache is empty, so blocked put_image calls can proceed
+            self._evictable.notify_all()
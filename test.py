@@ -1,74 +1,76 @@
 import subprocess
 from docker_image_cache import DockerImageCache, EvictionPolicy
-import threading
+from concurrent.futures import ThreadPoolExecutor
 import time
 import argparse
 import os
 import math
+import sys
+import queue
+import logging
+import logging.handlers
 import pandas as pd
 
-global_lock = threading.Lock()
-total_cache_miss = 0
-total_pulling_time = 0
-pandas_table = pd.DataFrame()
+logger = logging.getLogger(__name__)
 
 project_dir = os.path.dirname(os.path.abspath(__file__))
 
+def docker(*args, verbose=False):
+    # Run a docker CLI command directly, without going through a shell.
+    # Its output is only needed when verbose, so otherwise discard it
+    # instead of capturing and decoding it.
+    output = None if verbose else subprocess.DEVNULL
+    return subprocess.run(["docker", *args], stdout=output, stderr=output)
+
 def thread_func(cache, folder_to_zip, image_name, container_name, iterations, verbose=False):
     cache_miss = 0
     pulling_time = 0
     execution_time = 0
     for i in range(iterations):
         if verbose:
-            print(f"Iteration {i+1} of {iterations} with image {image_name}")
+            logger.info(f"Iteration {i+1} of {iterations} with image {image_name}")
         
-        message = cache.put_image(image_name, container_name)
-        # When the image is not in the cache, it will be pulled, and the cache will be updated
-        start_time = time.time()
-        while message is None:
-            if verbose: 
-                print("Cache is full, we have to wait")
-            time.sleep(0.1)
-            message = cache.put_image(image_name, container_name)
+        # When the image is not in the cache, it will be pulled, and the cache will be updated.
+        # If the cache is full, wait until an image can be evicted.
+        message = cache.put_image(image_name, container_name, block=True)
 
         if message == "Already in cache":
             if verbose:
-                print(f"Image {image_name} cache hit")
+                logger.info(f"Image {image_name} cache hit")
         elif message == "Directly put in cache":
             cache_miss += 1
-            subprocess.run(f"docker pull {image_name}", shell=True,capture_output=not verbose, text=True)
+            start_time = time.time()
+            docker("pull", image_name, verbose=verbose)
             end_time = time.time()
             pulling_time += end_time - start_time
             if verbose:
-                print(f"Cold miss so Image {image_name} pulled")
+                logger.info(f"Cold miss so Image {image_name} pulled")
         else:
             image_to_evict = message
             if verbose:
-                print(f"Evicting image: {image_to_evict}")
-            subprocess.run(f"docker rmi {image_to_evict}", shell=True, capture_output=not verbose, text=True)            
+                logger.info(f"Evicting image: {image_to_evict}")
+            docker("rmi", image_to_evict, verbose=verbose)
             cache_miss += 1
-            subprocess.run(f"docker pull {image_name}", shell=True,capture_output=not verbose, text=True)
+            start_time = time.time()
+            docker("pull", image_name, verbose=verbose)
             end_time = time.time()
             pulling_time += end_time - start_time
             if verbose:
-                print(f"Capcity miss so Image {image_name} pulled")
+                logger.info(f"Capcity miss so Image {image_name} pulled")
         
         # Run the container
         start_time = time.time()
-        subprocess.run(f"docker run -v {folder_to_zip}:/files/zip --rm --name {container_name} {image_name}", shell=True, capture_output=not verbose, text=True)
+        docker("run", "-v", f"{folder_to_zip}:/files/zip", "--rm", "--name", container_name, image_name, verbose=verbose)
         end_time = time.time()
-        execution_time += end_time - start_time
+        last_execution_time = end_time - start_time
+        execution_time += last_execution_time
         cache.record_stop(image_name, container_name)
-       
-        time.sleep(math.sqrt(execution_time))
 
-    with global_lock:
-        global total_cache_miss
-        total_cache_miss += cache_miss
-        global total_pulling_time
-        total_pulling_time += pulling_time
-        global pandas_table
-        pandas_table.loc[container_name] = [cache_miss/iterations, pulling_time/iterations, execution_time/iterations]
+        # Pace the next iteration by this run only, so that the pause does not
+        # keep growing with the accumulated execution time
+        time.sleep(math.sqrt(last_execution_time))
+
+    return cache_miss, pulling_time, execution_time
 
 def main():
     parser = argparse.ArgumentParser()
@@ -76,53 +78,73 @@ def main():
     parser.add_argument("--verbose", "-v", action="store_true")
     parser.add_argument("--time_window", "-t", type=int, required=False, default=60)
     args = parser.parse_args()
+
+    # The threads only enqueue their log records, and a listener thread writes them
+    # out, so that printing never blocks the timed sections of the threads
+    log_queue = queue.SimpleQueue()
+    logging.basicConfig(level=logging.INFO, format="%(message)s",
+                        handlers=[logging.handlers.QueueHandler(log_queue)])
+    listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler(sys.stdout))
+    listener.start()
+
     registry_ip = args.ip
     iterations = [10, 8, 6, 3]
     num_apps = len(iterations)
     total_iterations = sum(iterations)
-    policies = [EvictionPolicy.LEAST_FREQUENTLY_USED, EvictionPolicy.LEAST_TOTAL_TIME_USED]
+    policies = [EvictionPolicy.LEAST_FREQUENTLY_USED, EvictionPolicy.LEAST_TOTAL_TIME_USED, EvictionPolicy.CLOCK]
+    columns = ["Cache Miss Rate", "Startup Time (s)", "Execution Time (s)"]
 
-    # Run the experiment for each policy
+    # (folder_to_zip, image_name, container_name, iterations) of each app, shared by all policies
+    apps = [
+        (os.path.join(project_dir, f'data/app{i+1}/zip'),
+         f'{registry_ip}:5000/image-cache-app{i+1}:latest',
+         f'app{i+1}',
+         iterations[i])
+        for i in range(num_apps)
+    ]
+    image_names = [image_name for _, image_name, _, _ in apps]
+
+    # Initialize the cache, which is emptied before each experiment
+    cache = DockerImageCache(time_window=args.time_window, cache_size=num_apps-1)
+
+    # Stop the listener even if a thread failed, so that the queued records are still written out
+    try:
+        # Run the experiment for each policy
     
-    for policy in policies:
+        for policy in policies:
         
-        global total_cache_miss
-        global total_pulling_time
-        global pandas_table
-        total_cache_miss = 0
-        total_pulling_time = 0
-        columns = ["Cache Miss Rate", "Startup Time (s)", "Execution Time (s)"]
-        pandas_table = pd.DataFrame(columns=columns)
-        # Clean up the images
-        for i in range(num_apps):
-            subprocess.run(f"docker rmi {registry_ip}:5000/image-cache-app{i+1}:latest", shell=True, capture_output=not args.verbose, text=True)
-
-        # Initialize the cache
-        cache = DockerImageCache(time_window=args.time_window, cache_size=num_apps-1, policy=policy)
-        folders_to_zip = [
-            os.path.join(project_dir, f'data/app{i+1}/zip') for i in range(num_apps)
-        ]
-        # Create one thread for each function
-        threads = []
-        for i, folder in enumerate(folders_to_zip):
-            thread = threading.Thread(target=thread_func, args=(cache,folder, f'{registry_ip}:5000/image-cache-app{i+1}:latest', f'app{i+1}', iterations[i], args.verbose))
-            threads.append(thread)
+            # Clean up the images with a single command
+            docker("rmi", *image_names, verbose=args.verbose)
 
-        start_time = time.time()
-        # Start the threads
-        for thread in threads:
-            thread.start()
+            # Reset the cache to the policy
+            cache.reset(policy=policy)
+            start_time = time.time()
+            # Run one thread for each function and wait for all of them to finish
+            with ThreadPoolExecutor(max_workers=num_apps) as executor:
+                futures = [
+                    executor.submit(thread_func, cache, folder_to_zip, image_name, container_name, app_iterations, args.verbose)
+                    for folder_to_zip, image_name, container_name, app_iterations in apps
+                ]
+            end_time = time.time()
 
-        # Wait for all threads to finish
-        for thread in threads:
-            thread.join()
-        end_time = time.time()
+            # Aggregate the statistics returned by the threads
+            total_cache_miss = 0
+            rows = {}
+            for (_, _, container_name, app_iterations), future in zip(apps, futures):
+                cache_miss, pulling_time, execution_time = future.result()
+                total_cache_miss += cache_miss
+                rows[container_name] = [cache_miss/app_iterations, pulling_time/app_iterations, execution_time/app_iterations]
+            # Build the table at once rather than growing it one row at a time
+            pandas_table = pd.DataFrame.from_dict(rows, orient="index", columns=columns)
 
-        print(f"{policy} summary:")
-        pandas_table = pandas_table.sort_index()
-        print(pandas_table)
-        print(f"Total cache miss / total iterations: {total_cache_miss} / {total_iterations}")
-        print("--------------------------------")
+            # Log the summary too, so that it is not printed before the pending records of the threads
+            logger.info(f"{policy} summary:")
+            pandas_table = pandas_table.sort_index()
+            logger.info(pandas_table)
+            logger.info(f"Total cache miss / total iterations: {total_cache_miss} / {total_iterations}")
+            logger.info("--------------------------------")
+    finally:
+        listener.stop()
 
 if __name__ == "__main__":
     main()
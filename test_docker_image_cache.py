@@ -0,0 +1,172 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from docker_image_cache import DockerImageCache, EvictionPolicy
+
+
+class FakeClock:
+    """A time source that only moves when advanced."""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class DockerImageCacheTest(unittest.TestCase):
+
+    def test_usage_history_bounded_by_time_window(self):
+        # The usages that left the time window must be dropped for every policy,
+        # not only for the one that evicts by usage time
+        for policy in EvictionPolicy:
+            with self.subTest(policy=policy):
+                clock = FakeClock()
+                cache = DockerImageCache(time_window=10, cache_size=4, policy=policy,
+                                         time_source=clock)
+                for i in range(10000):
+                    container_id = f'container{i}'
+                    cache.put_image('image', container_id)
+                    clock.now += 1
+                    cache.record_stop('image', container_id)
+
+                self.assertLessEqual(len(cache.image_usage_history['image']), 11)
+                self.assertLessEqual(len(cache._expirations), 11)
+                self.assertLessEqual(len(cache._eviction_heap), 2 * cache.cache_size + 16)
+
+    def test_ties_evict_the_image_cached_first(self):
+        for policy in (EvictionPolicy.LEAST_FREQUENTLY_USED, EvictionPolicy.LEAST_TOTAL_TIME_USED):
+            with self.subTest(policy=policy):
+                clock = FakeClock()
+                cache = DockerImageCache(time_window=10, cache_size=2, policy=policy,
+                                         time_source=clock)
+                cache.put_image('zeta', 'container1')
+                cache.put_image('alpha', 'container2')
+                clock.now += 1
+                cache.record_stop('alpha', 'container2')
+                cache.record_stop('zeta', 'container1')
+
+                self.assertEqual(cache.put_image('beta', 'container3'), 'zeta')
+
+    def test_clock_gives_referenced_images_a_second_chance(self):
+        cache = DockerImageCache(cache_size=4, policy=EvictionPolicy.CLOCK, time_source=FakeClock())
+        for i in range(1, 5):
+            cache.put_image(f'image{i}', f'container{i}')
+        for i in range(1, 4):
+            cache.record_stop(f'image{i}', f'container{i}')
+
+        # All the images are referenced, so the hand clears the bits of the unused ones
+        # and passes image4, which is in use. After one revolution it stops at image1.
+        self.assertEqual(cache.put_image('image5', 'container5'), 'image1')
+
+        # image5 was inserted behind the hand, which points at image2. Using image2
+        # again sets its bit, so the hand passes it and stops at image3.
+        cache.put_image('image2', 'container6')
+        cache.record_stop('image2', 'container6')
+        self.assertEqual(cache.put_image('image6', 'container7'), 'image3')
+
+    def test_stop_with_wrong_image_is_ignored(self):
+        for policy in EvictionPolicy:
+            with self.subTest(policy=policy):
+                cache = DockerImageCache(cache_size=1, policy=policy, time_source=FakeClock())
+                cache.put_image('image1', 'container1')
+                cache.record_stop('image2', 'container1')
+                self.assertFalse(cache.is_unused('image1'))
+
+                cache.record_stop('image1', 'container1')
+                self.assertTrue(cache.is_unused('image1'))
+                self.assertEqual(cache.put_image('image2', 'container2'), 'image1')
+
+                # Reusing the ID of a running container stops it on its previous image
+                cache = DockerImageCache(cache_size=2, policy=policy, time_source=FakeClock())
+                cache.put_image('image1', 'container1')
+                cache.put_image('image2', 'container1')
+                cache.record_stop('image1', 'container1')
+                cache.record_stop('image2', 'container1')
+                self.assertTrue(cache.is_unused('image1'))
+                self.assertTrue(cache.is_unused('image2'))
+                self.assertIsNotNone(cache.put_image('image3', 'container2'))
+
+    def test_record_stops(self):
+        clock = FakeClock()
+        cache = DockerImageCache(time_window=10, cache_size=2, time_source=clock)
+        cache.put_image('image1', 'container1')
+        cache.put_image('image1', 'container2')
+        cache.put_image('image2', 'container3')
+        clock.now += 2
+
+        cache.record_stops([('image1', 'container1'), ('image2', 'container3')])
+        self.assertEqual(cache.get_unused_images(), ['image2'])
+
+        cache.record_stops(iter([('image1', 'container2')]))
+        self.assertEqual(sorted(cache.get_unused_images()), ['image1', 'image2'])
+        self.assertEqual(sorted(cache.get_image_stats()),
+                         [('image1', 0, 2.0, 4.0), ('image2', 0, 2.0, 2.0)])
+
+    def test_record_stops_wakes_up_blocked_put(self):
+        cache = DockerImageCache(cache_size=1, time_source=FakeClock())
+        cache.put_image('image1', 'container1')
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(cache.put_image, 'image2', 'container2',
+                                     block=True, timeout=5)
+            cache.record_stops([('image1', 'container1')])
+            self.assertEqual(future.result(), 'image1')
+
+    def test_record_stop_by_container(self):
+        clock = FakeClock()
+        cache = DockerImageCache(cache_size=1, time_source=clock)
+        cache.put_image('image1', 'container1')
+        clock.now += 3
+
+        self.assertEqual(cache.record_stop_by_container('container1'), 'image1')
+        self.assertTrue(cache.is_unused('image1'))
+        self.assertEqual(cache.get_image_stats(), [('image1', 0, 3.0, 3.0)])
+
+        # The container is not running anymore
+        self.assertIsNone(cache.record_stop_by_container('container1'))
+        self.assertIsNone(cache.record_stop_by_container('container2'))
+
+    def test_reset(self):
+        cache = DockerImageCache(cache_size=1, time_source=FakeClock())
+        cache.put_image('image1', 'container1')
+
+        cache.reset(policy=EvictionPolicy.CLOCK)
+        self.assertEqual(cache.policy, EvictionPolicy.CLOCK)
+        self.assertEqual(cache.get_image_stats(), [])
+
+        # The running container was forgotten, and the cache has room again
+        cache.record_stop('image1', 'container1')
+        self.assertEqual(cache.get_unused_images(), [])
+        self.assertEqual(cache.put_image('image2', 'container2'), 'Directly put in cache')
+
+    def test_remove_image(self):
+        clock = FakeClock()
+        cache = DockerImageCache(time_window=10, cache_size=1, time_source=clock)
+        cache.put_image('image1', 'container1')
+        self.assertFalse(cache.remove_image('image1'))
+
+        clock.now += 1
+        cache.record_stop('image1', 'container1')
+        cache.put_image('image2', 'container2')
+
+        # image1 was evicted: its statistics are kept and not touched
+        self.assertFalse(cache.remove_image('image1'))
+        self.assertEqual(cache.image_last_used['image1'], 0.0)
+        self.assertEqual(len(cache.image_usage_history['image1']), 1)
+
+        cache.record_stop('image2', 'container2')
+        self.assertTrue(cache.remove_image('image2'))
+        self.assertEqual(cache.get_image_stats(), [])
+        self.assertNotIn('image2', cache.image_last_used)
+        self.assertEqual(cache.put_image('image3', 'container3'), 'Directly put in cache')
+
+    def test_blocking_put_times_out_with_frozen_clock(self):
+        # The timeout is measured in real time, whatever the time source
+        cache = DockerImageCache(cache_size=1, time_source=FakeClock())
+        cache.put_image('image1', 'container1')
+        self.assertIsNone(cache.put_image('image2', 'container2', block=True, timeout=0.05))
+
+
+if __name__ == '__main__':
+    unittest.main()